@@ -1,52 +1,100 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
+import matplotlib
+
+# With no display to show the plot on, skip GUI backend setup and render with Agg
+HEADLESS = sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+if HEADLESS:
+    matplotlib.use("Agg")
+matplotlib.rcParams["path.simplify"] = True
+matplotlib.rcParams["path.simplify_threshold"] = 1.0
 import matplotlib.pyplot as plt
+plt.style.use("seaborn-v0_8-whitegrid")
 import yfinance as yf
-from llm_integration import LLMPortfolioAnalyzer
 
 # === Load and prepare ChatGPT portfolio ===
-chatgpt_df = pd.read_csv("Scripts and CSV files/chatgpt_portfolio_update.csv")
-chatgpt_totals = chatgpt_df[chatgpt_df['Ticker'] == 'TOTAL'].copy()
-chatgpt_totals['Date'] = pd.to_datetime(chatgpt_totals['Date'])
+csv_kwargs = dict(
+    usecols=["Date", "Ticker", "Total Equity"],
+    dtype={"Ticker": "category", "Total Equity": "float32"},
+    parse_dates=["Date"],
+    na_values=[" "],
+)
+try:
+    chatgpt_df = pd.read_csv("Scripts and CSV files/chatgpt_portfolio_update.csv", engine="pyarrow", **csv_kwargs)
+except ImportError:
+    chatgpt_df = pd.read_csv("Scripts and CSV files/chatgpt_portfolio_update.csv", **csv_kwargs)
+chatgpt_totals = chatgpt_df.set_index('Ticker', drop=False).loc[['TOTAL']].copy()
 
 # Add fake baseline row for June 27 (weekend)
-baseline_date = pd.Timestamp("2025-06-27")
+baseline_date = np.datetime64("2025-06-27", "ns")
 baseline_equity = 100  # Starting value
-baseline_chatgpt_row = pd.DataFrame({
-    "Date": [baseline_date],
-    "Total Equity": [baseline_equity]   
-    })
-chatgpt_totals = pd.concat([baseline_chatgpt_row, chatgpt_totals], ignore_index=True).sort_values("Date")
+chatgpt_totals = chatgpt_totals.set_index("Date")[["Total Equity"]]
+# A date logged twice keeps its latest TOTAL row, so the index stays unique for reindexing
+chatgpt_totals = chatgpt_totals[~chatgpt_totals.index.duplicated(keep="last")]
+# union() sorts, which puts the baseline ahead of the logged dates
+chatgpt_totals = chatgpt_totals.reindex(chatgpt_totals.index.union([baseline_date]))
+chatgpt_totals.loc[baseline_date, "Total Equity"] = baseline_equity
+chatgpt_totals = chatgpt_totals.rename_axis("Date").reset_index()
+chatgpt_totals["Total Equity"] = chatgpt_totals["Total Equity"].astype(np.float32)
 
 # === Download and prepare Russell 2000 ===
 start_date = baseline_date
-end_date = chatgpt_totals['Date'].max()
+end_date = chatgpt_totals['Date'].values.max()
 
-sp500 = yf.download("^SPX", start=start_date, end=end_date + pd.Timedelta(days=1), progress=False)
-sp500 = sp500.reset_index()
+# The SPX history for a closed date range never changes, so reuse it across runs
+start_day, end_day = np.datetime_as_string([start_date, end_date], unit="D")
+cache_path = f"cache/spx_{start_day}_{end_day}.parquet"
+if os.path.exists(cache_path):
+    sp500 = pd.read_parquet(cache_path, columns=["Close"])
+else:
+    sp500 = yf.download("^SPX", start=pd.Timestamp(start_date), end=pd.Timestamp(end_date) + pd.Timedelta(days=1),
+                        progress=False, auto_adjust=False, actions=False)["Close"]
+    # Newer yfinance keys single-ticker downloads by ticker as well
+    if isinstance(sp500, pd.DataFrame):
+        sp500 = sp500.iloc[:, 0]
+    sp500 = sp500.rename("Close").astype(np.float32).to_frame()
 
-# Fix columns if downloaded with MultiIndex
-if isinstance(sp500.columns, pd.MultiIndex):
-    sp500.columns = sp500.columns.get_level_values(0)
-# Real close price on June 27 (pulled from YF)
-sp500_27_price = 6173.07
+    try:
+        os.makedirs("cache", exist_ok=True)
+        sp500.to_parquet(cache_path)
+    except ImportError:
+        pass  # no parquet engine installed; skip caching
 
-# Normalize to $100 baseline
-sp500_scaling_factor = 100 / sp500_27_price
-# create adjusted close col
+# merge_asof needs both keys in the same datetime unit; pandas 3 may parse or load
+# them as [s]/[us] while the baseline is [ns]
+sp500.index = sp500.index.astype("datetime64[ns]")
+chatgpt_totals["Date"] = chatgpt_totals["Date"].astype("datetime64[ns]")
 
+# Close on the baseline date (or the first session after it)
+baseline_idx = sp500.index.searchsorted(baseline_date)
+sp500_27_price = float(sp500["Close"].iat[baseline_idx])
 
+# Normalize to $100 baseline
+sp500_scaling_factor = np.float32(100 / sp500_27_price)
+# create adjusted close col (float32 is plenty of precision for a plot)
+close = sp500["Close"].to_numpy(dtype=np.float32, copy=False)
+sp500["SPX Value ($100 Invested)"] = close * sp500_scaling_factor
 
-sp500["SPX Value ($100 Invested)"] = sp500["Close"] * sp500_scaling_factor
+# Line up each portfolio date with the latest SPX close on or before it
+aligned = pd.merge_asof(
+    chatgpt_totals,
+    sp500[["SPX Value ($100 Invested)"]],
+    left_on="Date",
+    right_index=True,
+    direction="backward",
+)
 
 # === Plot ===
-plt.figure(figsize=(10, 6))
-plt.style.use("seaborn-v0_8-whitegrid")
-plt.plot(chatgpt_totals['Date'], chatgpt_totals["Total Equity"], label="ChatGPT ($100 Invested)", marker="o", color="blue", linewidth=2)
-plt.plot(sp500['Date'], sp500["SPX Value ($100 Invested)"], label="S&P 500 ($100 Invested)", marker="o", color="orange", linestyle='--', linewidth=2)
+fig, ax = plt.subplots(figsize=(10, 6), constrained_layout=True)
+# Plain arrays skip matplotlib's pandas conversion; small markers keep long series cheap to draw
+ax.plot(chatgpt_totals['Date'].to_numpy(), chatgpt_totals["Total Equity"].to_numpy(), label="ChatGPT ($100 Invested)", marker=".", markersize=3, color="blue", linewidth=2)
+ax.plot(sp500.index.to_numpy(), sp500["SPX Value ($100 Invested)"].to_numpy(), label="S&P 500 ($100 Invested)", marker=".", markersize=3, color="orange", linestyle='--', linewidth=2)
 
-final_date = chatgpt_totals['Date'].iloc[-1]
-final_chatgpt = float(chatgpt_totals["Total Equity"].iloc[-1])
-final_spx = sp500["SPX Value ($100 Invested)"].iloc[-1]
+final_date = aligned['Date'].iloc[-1]
+final_chatgpt = float(aligned["Total Equity"].iloc[-1])
+final_spx = float(aligned["SPX Value ($100 Invested)"].iloc[-1])
 
 plt.text(final_date, final_chatgpt + 0.3, f"+{final_chatgpt - 100:.1f}%", color="blue", fontsize=9)
 plt.text(final_date, final_spx + 0.9, f"+{final_spx - 100:.1f}%", color="orange", fontsize=9)
@@ -58,10 +106,11 @@ plt.title("ChatGPT's Micro Cap Portfolio vs. S&P 500")
 plt.xlabel("Date")
 plt.ylabel("Value of $100 Investment")
 plt.xticks(rotation=15)
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.show()
+ax.legend(loc="upper left", frameon=False)
+if HEADLESS:
+    plt.savefig("Scripts and CSV Files/performance_graph.png", dpi=150)
+else:
+    plt.show()
 
 # === AI Performance Analysis ===
 try:
@@ -69,6 +118,8 @@ try:
     print("🤖 AI PERFORMANCE ANALYSIS")
     print("="*60)
     
+    # Imported here so the plot doesn't pay for loading the LLM clients
+    from llm_integration import LLMPortfolioAnalyzer
     analyzer = LLMPortfolioAnalyzer(provider="ollama")
     
     # Calculate key metrics for AI analysis
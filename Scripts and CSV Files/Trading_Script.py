@@ -3,7 +3,7 @@ import pandas as pd
 from datetime import datetime
 import os
 import numpy as np 
-from llm_integration import LLMPortfolioAnalyzer
+from llm_integration import get_analyzer
 
 # === update logs for portfolio ===
 def process_portfolio(portfolio, starting_cash, use_llm_analysis=True):
@@ -94,11 +94,7 @@ def process_portfolio(portfolio, starting_cash, use_llm_analysis=True):
     # === LLM Analysis Integration ===
     if use_llm_analysis:
         try:
-            # Try Ollama first, fallback to Gemini
-            try:
-                analyzer = LLMPortfolioAnalyzer(provider="ollama")
-            except:
-                analyzer = LLMPortfolioAnalyzer(provider="gemini")
+            analyzer = get_analyzer()
             
             print("\n" + "="*50)
             print("🤖 AI PORTFOLIO ANALYSIS")
@@ -316,7 +312,7 @@ def daily_results(chatgpt_portfolio, cash):
         
         try:
             # Get AI analysis for significant moves
-            analyzer = LLMPortfolioAnalyzer(provider="ollama")
+            analyzer = get_analyzer()
             for ticker, change, price in significant_moves:
                 print(f"\n🔍 AI Analysis for {ticker}:")
                 analysis = analyzer.research_stock(ticker, price)
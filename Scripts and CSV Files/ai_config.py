@@ -4,8 +4,10 @@ Centralized configuration for all AI/LLM integrations
 """
 
 import os
+import importlib.util
 from typing import Dict, Optional, List
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 
 @dataclass
@@ -28,13 +30,19 @@ class AIConfigManager:
     
     def load_environment(self):
         """Load environment variables from .env file"""
+        try:
+            from dotenv import load_dotenv
+            # Same semantics as the fallback below: ./.env wins over the shell
+            load_dotenv(Path('.env'), override=True)
+            return
+        except ImportError:
+            pass
+        
         env_file = Path('.env')
         if env_file.exists():
             with open(env_file, 'r') as f:
-                for line in f:
-                    if '=' in line and not line.strip().startswith('#'):
-                        key, value = line.strip().split('=', 1)
-                        os.environ[key] = value
+                pairs = (line.split('=', 1) for line in f if '=' in line and not line.lstrip().startswith('#'))
+                os.environ.update({key.strip(): value.strip() for key, value in pairs})
     
     def _initialize_configs(self) -> Dict[str, AIConfig]:
         """Initialize AI provider configurations"""
@@ -59,32 +67,55 @@ class AIConfigManager:
         """Get configuration for specific AI provider"""
         return self.configs.get(provider.lower())
     
-    def get_available_providers(self) -> List[str]:
-        """Get list of available AI providers"""
+    @cached_property
+    def http_session(self):
+        """Pooled keep-alive session shared by the Ollama probe and generate calls"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+    
+    @cached_property
+    def ollama_reachable(self) -> bool:
+        """Probe the Ollama server once; the result is reused for the process"""
+        try:
+            response = self.http_session.get(f"{self.configs['ollama'].host}/api/tags", timeout=5)
+            return response.status_code == 200
+        except:
+            return False
+    
+    @cached_property
+    def _gemini_installed(self) -> bool:
+        """Whether the Gemini SDK is installed, checked without importing it"""
+        try:
+            return importlib.util.find_spec('google.generativeai') is not None
+        except ImportError:
+            return False
+    
+    @cached_property
+    def available_providers(self) -> List[str]:
+        """List of available AI providers"""
         available = []
         
         # Check Ollama
-        try:
-            import requests
-            response = requests.get(f"{self.configs['ollama'].host}/api/tags", timeout=5)
-            if response.status_code == 200:
-                available.append('ollama')
-        except:
-            pass
+        if self.ollama_reachable:
+            available.append('ollama')
         
         # Check Gemini
         if self.configs['gemini'].api_key and self.configs['gemini'].api_key != 'your_google_api_key_here':
-            try:
-                import google.generativeai as genai
+            if self._gemini_installed:
                 available.append('gemini')
-            except ImportError:
-                pass
         
         return available
     
-    def get_preferred_provider(self) -> Optional[str]:
-        """Get the preferred AI provider based on availability"""
-        available = self.get_available_providers()
+    @cached_property
+    def preferred_provider(self) -> Optional[str]:
+        """Preferred AI provider based on availability"""
+        available = self.available_providers
         
         # Preference order: ollama (local) -> gemini (cloud)
         for provider in ['ollama', 'gemini']:
@@ -93,27 +124,31 @@ class AIConfigManager:
         
         return None
     
-    def validate_setup(self) -> Dict[str, bool]:
-        """Validate AI setup and return status"""
+    @cached_property
+    def setup_status(self) -> Dict[str, bool]:
+        """AI setup status per provider"""
         status = {}
         
         # Check Ollama
-        try:
-            import requests
-            response = requests.get(f"{self.configs['ollama'].host}/api/tags", timeout=5)
-            status['ollama'] = response.status_code == 200
-        except:
-            status['ollama'] = False
+        status['ollama'] = self.ollama_reachable
         
         # Check Gemini
-        try:
-            import google.generativeai as genai
-            api_key = self.configs['gemini'].api_key
-            status['gemini'] = bool(api_key and api_key != 'your_google_api_key_here')
-        except ImportError:
-            status['gemini'] = False
+        api_key = self.configs['gemini'].api_key
+        status['gemini'] = self._gemini_installed and bool(api_key and api_key != 'your_google_api_key_here')
         
         return status
+    
+    def get_available_providers(self) -> List[str]:
+        """Get list of available AI providers"""
+        return self.available_providers
+    
+    def get_preferred_provider(self) -> Optional[str]:
+        """Get the preferred AI provider based on availability"""
+        return self.preferred_provider
+    
+    def validate_setup(self) -> Dict[str, bool]:
+        """Validate AI setup and return status"""
+        return self.setup_status
 
 # Global configuration instance
 ai_config = AIConfigManager()
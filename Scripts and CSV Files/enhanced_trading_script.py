@@ -3,104 +3,101 @@ import pandas as pd
 from datetime import datetime
 import os
 import numpy as np 
-from llm_integration import LLMPortfolioAnalyzer
+from concurrent.futures import ThreadPoolExecutor
+from llm_integration import get_analyzer
+from compat import njit
 
 # === Enhanced Trading Script with LLM Integration ===
 
+def _fetch_close(ticker):
+    """Return (ticker, latest close rounded to cents) or (ticker, None) if no data"""
+    data = yf.Ticker(ticker).history(period="1d")
+    return ticker, (None if data.empty else round(data["Close"].iloc[-1], 2))
+
+def _append_csv(path, df):
+    """Append rows to a CSV, writing the header only when the file is new"""
+    new = not os.path.exists(path)
+    df.to_csv(path, mode="a", header=new, index=False)
+
+def _append_trade_log(log):
+    """Append one entry to the trade log in its fixed column order"""
+    _append_csv("chatgpt_trade_log.csv", pd.DataFrame([log], columns=TRADE_LOG_FIELDS))
+
 def process_portfolio_with_llm_analysis(portfolio, starting_cash, use_llm=True):
     """Enhanced portfolio processing with optional LLM analysis"""
-    results = []
-    total_value = 0
-    total_pnl = 0
     cash = starting_cash
-    
-    for _, stock in portfolio.iterrows():
-        ticker = stock["ticker"]
-        shares = int(stock["shares"])
-        cost = stock["buy_price"]
-        stop = stock["stop_loss"]
-        data = yf.Ticker(ticker).history(period="1d")
-
-        if data.empty:
-            print(f"No data for {ticker}")
-            row = {
-                "Date": today,
-                "Ticker": ticker,
-                "Shares": shares,
-                "Cost Basis": cost,
-                "Stop Loss": stop,
-                "Current Price": "",
-                "Total Value": "",
-                "PnL": "",
-                "Action": "NO DATA",
-                "Cash Balance": "",
-                "Total Equity": ""
-            }
-        else:
-            price = round(data["Close"].iloc[-1], 2)
-            value = round(price * shares, 2)
-            pnl = round((price - cost) * shares, 2)
-
-            if price <= stop:
-                action = "SELL - Stop Loss Triggered"
-                cash += value
-                log_sell(ticker, shares, price, cost, pnl, action)
-            else:
-                action = "HOLD"
-                total_value += value
-                total_pnl += pnl
-
-            row = {
-                "Date": today,
-                "Ticker": ticker,
-                "Shares": shares,
-                "Cost Basis": cost,
-                "Stop Loss": stop,
-                "Current Price": price,
-                "Total Value": value,
-                "PnL": pnl,
-                "Action": action,
-                "Cash Balance": "",
-                "Total Equity": ""
-            }
 
-        results.append(row)
+    # Fetch all closes concurrently, then do the bookkeeping column-wise
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(portfolio)))) as executor:
+        closes = dict(executor.map(_fetch_close, portfolio["ticker"]))
 
-    # === Add TOTAL row ===
-    total_row = {
-        "Date": today,
-        "Ticker": "TOTAL",
-        "Shares": "",
-        "Cost Basis": "",
-        "Stop Loss": "",
-        "Current Price": "",
-        "Total Value": round(total_value, 2),
-        "PnL": round(total_pnl, 2),
-        "Action": "",
-        "Cash Balance": round(cash, 2),
-        "Total Equity": round(total_value + cash, 2)
-    }
-    results.append(total_row)
+    tickers = portfolio["ticker"]
+    shares = portfolio["shares"].astype(int)
+    cost = portfolio["buy_price"]
+    stop = portfolio["stop_loss"]
+    price = pd.to_numeric(tickers.map(closes), errors="coerce")
+
+    has_data = price.notna()
+    value = (price * shares).round(2)
+    pnl = ((price - cost) * shares).round(2)
+    stop_hit = has_data & (price <= stop)
+    hold = has_data & ~stop_hit
+    action = np.select([~has_data, stop_hit], ["NO DATA", "SELL - Stop Loss Triggered"], default="HOLD")
+
+    for ticker in tickers[~has_data]:
+        print(f"No data for {ticker}")
+    # Logs store shares as floats (e.g. 6.0), as the old concat-and-rewrite produced
+    for row in zip(tickers[stop_hit], shares[stop_hit].astype(float), price[stop_hit], cost[stop_hit], pnl[stop_hit]):
+        log_sell(*row, "SELL - Stop Loss Triggered")
+
+    cash += value[stop_hit].sum()
+    total_value = value[hold].sum()
+    total_pnl = pnl[hold].sum()
+
+    # === Build holdings + TOTAL row column-wise ===
+    n = len(portfolio)
+
+    def column(holdings, total):
+        out = np.empty(n + 1, dtype=object)
+        out[:n] = holdings
+        out[n] = total
+        return out
+
+    df = pd.DataFrame({
+        "Date": np.full(n + 1, today, dtype=object),
+        "Ticker": column(tickers.to_numpy(), "TOTAL"),
+        "Shares": column(shares.to_numpy(dtype=float), ""),
+        "Cost Basis": column(cost.to_numpy(), ""),
+        "Stop Loss": column(stop.to_numpy(), ""),
+        "Current Price": column(price.to_numpy(), ""),
+        "Total Value": column(value.to_numpy(), round(total_value, 2)),
+        "PnL": column(pnl.to_numpy(), round(total_pnl, 2)),
+        "Action": column(action, ""),
+        "Cash Balance": column("", round(cash, 2)),
+        "Total Equity": column("", round(total_value + cash, 2))
+    }, copy=False)
 
     # === Save to CSV ===
     file = f"chatgpt_portfolio_update.csv"
-    df = pd.DataFrame(results)
 
-    if os.path.exists(file):
-        existing = pd.read_csv(file)
+    # Read the history once: it tells us whether today is already logged and
+    # is handed back to the caller so nothing re-reads the file this run
+    existing = pd.read_csv(file) if os.path.exists(file) else pd.DataFrame(columns=df.columns)
+    last_date = existing["Date"].iat[-1] if not existing.empty else None
+
+    if last_date == today:
+        # Re-run on the same day: replace today's rows
         existing = existing[existing["Date"] != today]
         df = pd.concat([existing, df], ignore_index=True)
-
-    df.to_csv(file, index=False)
+        df.to_csv(file, index=False)
+    else:
+        _append_csv(file, df)
+        df = pd.concat([existing, df], ignore_index=True)
     
     # === LLM Analysis ===
     if use_llm:
         try:
-            # Try Ollama first, fallback to Gemini
-            try:
-                analyzer = LLMPortfolioAnalyzer(provider="ollama")
-            except:
-                analyzer = LLMPortfolioAnalyzer(provider="gemini")
+            analyzer = get_analyzer()
             
             print("\n" + "="*60)
             print("🤖 LLM PORTFOLIO ANALYSIS")
@@ -118,16 +115,12 @@ def process_portfolio_with_llm_analysis(portfolio, starting_cash, use_llm=True):
             print(f"LLM analysis failed: {e}")
             print("Continuing with standard analysis...")
     
-    return portfolio
+    return portfolio, df
 
 def get_llm_stock_research(ticker, current_price=None):
     """Get LLM-powered research on a specific stock"""
     try:
-        # Try Ollama first, fallback to Gemini
-        try:
-            analyzer = LLMPortfolioAnalyzer(provider="ollama")
-        except:
-            analyzer = LLMPortfolioAnalyzer(provider="gemini")
+        analyzer = get_analyzer()
         
         print(f"\n🔍 LLM Research for {ticker}")
         print("="*40)
@@ -146,14 +139,35 @@ def get_llm_stock_research(ticker, current_price=None):
         print(f"LLM research failed for {ticker}: {e}")
         return None
 
+def get_llm_stock_research_batch(items):
+    """Get LLM-powered research on several stocks with one model call"""
+    try:
+        analyzer = get_analyzer()
+        research = analyzer.research_stocks(items)
+    except Exception as e:
+        print(f"LLM research failed for {', '.join(t for t, _ in items)}: {e}")
+        return {}
+    
+    for ticker, _ in items:
+        print(f"\n🔍 LLM Research for {ticker}")
+        print("="*40)
+        if ticker not in research:
+            print("No research section returned")
+            continue
+        print(research[ticker])
+        
+        # Save research to file
+        with open(f"llm_research_{ticker}_{today}.txt", "w") as f:
+            f.write(f"LLM Stock Research: {ticker} - {today}\n")
+            f.write("="*50 + "\n")
+            f.write(research[ticker])
+    
+    return research
+
 def get_llm_trading_strategy(portfolio_data, market_conditions=""):
     """Get LLM-powered trading strategy recommendations"""
     try:
-        # Try Ollama first, fallback to Gemini
-        try:
-            analyzer = LLMPortfolioAnalyzer(provider="ollama")
-        except:
-            analyzer = LLMPortfolioAnalyzer(provider="gemini")
+        analyzer = get_analyzer()
         
         print("\n📈 LLM TRADING STRATEGY")
         print("="*40)
@@ -173,6 +187,9 @@ def get_llm_trading_strategy(portfolio_data, market_conditions=""):
         return None
 
 # === Original functions (unchanged) ===
+TRADE_LOG_FIELDS = ("Date", "Ticker", "Shares Bought", "Buy Price", "Cost Basis",
+                    "PnL", "Reason", "Shares Sold", "Sell Price")
+
 def log_sell(ticker, shares, price, cost, pnl, action):
     log = {
         "Date": today,
@@ -184,13 +201,7 @@ def log_sell(ticker, shares, price, cost, pnl, action):
         "Reason": "AUTOMATED SELL - STOPLOSS TRIGGERED"
     }
 
-    file = f"chatgpt_trade_log.csv"
-    if os.path.exists(file):
-        df = pd.read_csv(file)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(file, index=False)
+    _append_trade_log(log)
 
 def log_manual_buy(buy_price, shares, ticker, cash, stoploss, chatgpt_portfolio):
     check = input(f"""You are currently trying to buy {ticker}.
@@ -198,9 +209,14 @@ def log_manual_buy(buy_price, shares, ticker, cash, stoploss, chatgpt_portfolio)
     if check == "1":
         raise SystemExit("Please remove this function call.")
 
-    data = yf.download(ticker, period="1d")
-    if data.empty:
-        SystemExit(f"error, could not find ticker {ticker}")
+    # fast_info's last_price still comes from a price-history request; unknown
+    # symbols may come back as None/NaN instead of raising, so check the value
+    try:
+        last_price = yf.Ticker(ticker).fast_info["last_price"]
+    except Exception:
+        last_price = None
+    if last_price is None or pd.isna(last_price):
+        raise SystemExit(f"error, could not find ticker {ticker}")
     if buy_price * shares > cash:
         SystemExit(f"error, you have {cash} but are trying to spend {buy_price * shares}. Are you sure you can do this?")
     pnl = 0.0
@@ -215,13 +231,7 @@ def log_manual_buy(buy_price, shares, ticker, cash, stoploss, chatgpt_portfolio)
             "Reason": "MANUAL BUY - New position"
             }
 
-    file = "chatgpt_trade_log.csv"
-    if os.path.exists(file):
-        df = pd.read_csv(file)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(file, index=False)
+    _append_trade_log(log)
     
     new_trade = {"ticker": ticker, "shares": shares, "stop_loss": stoploss,
                 "buy_price": buy_price, "cost_basis": buy_price * shares}
@@ -262,13 +272,7 @@ If this is a mistake, enter 1. """)
         "Shares Sold": shares_sold,
         "Sell Price": sell_price
     }
-    file = "chatgpt_trade_log.csv"
-    if os.path.exists(file):
-        df = pd.read_csv(file)
-        df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
-    else:
-        df = pd.DataFrame([log])
-    df.to_csv(file, index=False)
+    _append_trade_log(log)
     
     if total_shares == shares_sold:
         chatgpt_portfolio = chatgpt_portfolio[chatgpt_portfolio["ticker"] != ticker]
@@ -279,24 +283,103 @@ If this is a mistake, enter 1. """)
     cash = cash + shares_sold * sell_price
     return cash, chatgpt_portfolio
 
-def daily_results_with_llm(chatgpt_portfolio, cash, use_llm_research=False):
-    """Enhanced daily results with optional LLM research"""
+@njit(cache=True, fastmath=True)
+def _sharpe_sortino(equity, rf_period):
+    """Total-period Sharpe and Sortino ratios from an equity curve.
+
+    Single pass over the daily returns with Welford updates for the sample
+    std of all returns and of the negative ones (ddof=1, as pandas uses).
+    Returns NaN for a ratio whose std is undefined or zero.
+    """
+    n = equity.size - 1
+    mean = 0.0
+    m2 = 0.0
+    neg_n = 0
+    neg_mean = 0.0
+    neg_m2 = 0.0
+    for i in range(n):
+        r = equity[i + 1] / equity[i] - 1.0
+        delta = r - mean
+        mean += delta / (i + 1)
+        m2 += delta * (r - mean)
+        if r < 0.0:
+            neg_n += 1
+            delta = r - neg_mean
+            neg_mean += delta / neg_n
+            neg_m2 += delta * (r - neg_mean)
+
+    excess = equity[n] / equity[0] - 1.0 - rf_period
+    sqrt_n = np.sqrt(n)
+    sharpe = np.nan
+    sortino = np.nan
+    if n > 1 and m2 > 0.0:
+        sharpe = excess / (np.sqrt(m2 / (n - 1)) * sqrt_n)
+    if neg_n > 1 and neg_m2 > 0.0:
+        sortino = excess / (np.sqrt(neg_m2 / (neg_n - 1)) * sqrt_n)
+    return sharpe, sortino
+
+def _download_spx_closes(start, end):
+    """Download ^SPX closes as a Date/Close frame"""
+    close = yf.download("^SPX", start=start, end=end, progress=False)["Close"]
+    # Newer yfinance keys single-ticker downloads by ticker as well
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.rename("Close").rename_axis("Date").reset_index()
+
+def _load_spx_closes(final_date, cache_file="spx_cache.parquet"):
+    """^SPX closes from the 2025-06-27 baseline through final_date.
+
+    History is cached in a parquet file. When newer dates are needed, the
+    download restarts at the last cached session so a partial intraday
+    close stored on an earlier run gets corrected.
+    """
+    end = final_date + pd.Timedelta(days=1)
+    try:
+        if os.path.exists(cache_file):
+            spx = pd.read_parquet(cache_file)
+            last = spx["Date"].max()
+            if last < final_date:
+                new = _download_spx_closes(last, end)
+                spx = pd.concat([spx, new]).drop_duplicates("Date", keep="last").reset_index(drop=True)
+                spx.to_parquet(cache_file, index=False)
+        else:
+            spx = _download_spx_closes("2025-06-27", end)
+            spx.to_parquet(cache_file, index=False)
+    except ImportError:
+        # No parquet engine installed; fall back to a full download
+        spx = _download_spx_closes("2025-06-27", end)
+    return spx[spx["Date"] <= final_date]
+
+def daily_results_with_llm(chatgpt_portfolio, cash, use_llm_research=False, portfolio_updates=None):
+    """Enhanced daily results with optional LLM research
+
+    portfolio_updates is the portfolio history DataFrame returned by
+    process_portfolio_with_llm_analysis; it is read from CSV when omitted.
+    """
     if isinstance(chatgpt_portfolio, pd.DataFrame):
             chatgpt_portfolio = chatgpt_portfolio.to_dict(orient="records")
     
     print(f"prices and updates for {today}")
     
-    # Get price data
-    for stock in chatgpt_portfolio + [{"ticker": "^RUT"}] + [{"ticker": "IWO"}] + [{"ticker": "XBI"}]:
-        ticker = stock['ticker']
+    # Get price data for every ticker in one batched request
+    tickers = [stock['ticker'] for stock in chatgpt_portfolio] + ["^RUT", "IWO", "XBI"]
+    try:
+        batch = yf.download(tickers, period="2d", group_by='ticker', threads=True, progress=False)
+    except Exception as e:
+        raise Exception(f"Download for {', '.join(tickers)} failed. {e} Try checking internet connection.")
+
+    research_items = []
+    for ticker in tickers:
         try:
-            data = yf.download(ticker, period="2d", progress=False)
-            price = float(data['Close'].iloc[-1].item())
-            last_price = float(data['Close'].iloc[-2].item())
+            # Indices and ETFs can trade on different calendars, so drop padded rows
+            data = batch[ticker].dropna(how="all")
+            price = float(data['Close'].iat[-1])
+            last_price = float(data['Close'].iat[-2])
             percent_change = ((price - last_price) / last_price) * 100
-            volume = float(data['Volume'].iloc[-1].item())
-        except Exception as e:
-            raise Exception(f"Download for {ticker} failed. {e} Try checking internet connection.")
+            volume = float(data['Volume'].iat[-1])
+        except (KeyError, IndexError):
+            print(f"No data for {ticker}")
+            continue
         
         print(f"{ticker} closing price: {price:.2f}")
         print(f"{ticker} volume for today: ${volume:,}")
@@ -304,37 +387,44 @@ def daily_results_with_llm(chatgpt_portfolio, cash, use_llm_research=False):
         
         # Optional LLM research for portfolio holdings
         if use_llm_research and ticker not in ["^RUT", "IWO", "XBI"]:
-            get_llm_stock_research(ticker, price)
+            research_items.append((ticker, price))
+    
+    if research_items:
+        get_llm_stock_research_batch(research_items)
     
     # Portfolio performance metrics
-    chatgpt_df = pd.read_csv("chatgpt_portfolio_update.csv")
+    if portfolio_updates is not None:
+        chatgpt_df = portfolio_updates
+    else:
+        chatgpt_df = pd.read_csv(
+            "chatgpt_portfolio_update.csv",
+            usecols=['Date', 'Ticker', 'Total Equity'],
+            dtype={'Ticker': 'string', 'Total Equity': 'float64'},
+            parse_dates=['Date'],
+            na_values=[' '],
+        )
     chatgpt_totals = chatgpt_df[chatgpt_df['Ticker'] == 'TOTAL'].copy() 
-    chatgpt_totals['Date'] = pd.to_datetime(chatgpt_totals['Date'])
+    if not pd.api.types.is_datetime64_any_dtype(chatgpt_totals['Date']):
+        # In-memory history keeps the dates as logged strings
+        chatgpt_totals['Date'] = pd.to_datetime(chatgpt_totals['Date'])
     final_date = chatgpt_totals['Date'].max()
     final_value = chatgpt_totals[chatgpt_totals['Date'] == final_date]
     final_equity = float(final_value['Total Equity'].values[0])
-    equity_series = chatgpt_totals['Total Equity'].astype(float).reset_index(drop=True)
+    equity = chatgpt_totals['Total Equity'].to_numpy(dtype=np.float64)
 
-    daily_pct = equity_series.pct_change().dropna()
-    total_return = (equity_series.iloc[-1] - equity_series.iloc[0]) / equity_series.iloc[0]
-    n_days = len(daily_pct)
+    n_days = equity.size - 1
     rf_annual = 0.045
     rf_period = (1 + rf_annual) ** (n_days / 252) - 1
-    std_daily = daily_pct.std()
-    negative_pct = daily_pct[daily_pct < 0]
-    negative_std = negative_pct.std()
-    sharpe_total = (total_return - rf_period) / (std_daily * np.sqrt(n_days))
-    sortino_total = (total_return - rf_period) / (negative_std * np.sqrt(n_days))
+    sharpe_total, sortino_total = _sharpe_sortino(equity, rf_period)
 
     print(f"Total Sharpe Ratio over {n_days} days: {sharpe_total:.4f}")
     print(f"Total Sortino Ratio over {n_days} days: {sortino_total:.4f}")
     print(f"Latest ChatGPT Equity: ${final_equity:.2f}")
     
     # S&P 500 comparison
-    spx = yf.download("^SPX", start="2025-06-27", end=final_date + pd.Timedelta(days=1), progress=False)
-    spx = spx.reset_index()
-    initial_price = spx["Close"].iloc[0].item()
-    price_now = spx["Close"].iloc[-1].item()
+    spx = _load_spx_closes(final_date)
+    closes = spx["Close"].to_numpy(dtype=np.float64)
+    initial_price, price_now = closes[0], closes[-1]
     scaling_factor = 100 / initial_price
     spx_value = price_now * scaling_factor
     print(f"$100 Invested in the S&P 500: ${spx_value:.2f}")
@@ -360,11 +450,10 @@ if __name__ == "__main__":
     print("="*60)
     
     # Process portfolio with LLM analysis
-    chatgpt_portfolio = process_portfolio_with_llm_analysis(chatgpt_portfolio, cash, use_llm=True)
+    chatgpt_portfolio, portfolio_df = process_portfolio_with_llm_analysis(chatgpt_portfolio, cash, use_llm=True)
     
     # Daily results with optional LLM research
-    daily_results_with_llm(chatgpt_portfolio, cash, use_llm_research=True)
+    daily_results_with_llm(chatgpt_portfolio, cash, use_llm_research=True, portfolio_updates=portfolio_df)
     
     # Generate trading strategy
-    portfolio_df = pd.read_csv("chatgpt_portfolio_update.csv")
     get_llm_trading_strategy(portfolio_df, "Current market showing mixed signals with micro-cap volatility")
\ No newline at end of file
@@ -1,25 +1,23 @@
 import os
+import functools
 import json
+import re
 import requests
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import pandas as pd
 from ai_config import get_ai_config
+from compat import ORJSON_AVAILABLE, orjson
 
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    print("Google Generative AI not available. Install with: pip install google-generativeai")
 
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    DOTENV_AVAILABLE = True
-except ImportError:
-    DOTENV_AVAILABLE = False
-    print("python-dotenv not available. Install with: pip install python-dotenv")
+def _dumps_indented(obj) -> str:
+    """Serialize to indented JSON, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, indent=2)
+
+# "## TICKER ..." section headers in batched research responses
+_SECTION_HEADER = re.compile(r'(?m)^##\s+([A-Z0-9.^-]+)[^\n]*\n?')
 
 
 class LLMPortfolioAnalyzer:
@@ -41,7 +39,7 @@ class LLMPortfolioAnalyzer:
         
         # Auto-select provider if not specified or unavailable
         if provider == "auto":
-            provider = self.config_manager.get_preferred_provider()
+            provider = self.config_manager.preferred_provider
             if not provider:
                 raise ValueError("No AI providers available. Please configure Ollama or Gemini.")
         
@@ -63,13 +61,17 @@ class LLMPortfolioAnalyzer:
     
     def _setup_gemini(self):
         """Setup Google Gemini"""
-        if not GEMINI_AVAILABLE:
-            raise ImportError("Google Generative AI not installed")
-        
         api_key = self.config.api_key
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
         
+        # Imported here: the SDK pulls in gRPC/protobuf, which Ollama-only runs don't need
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            raise ImportError("Google Generative AI not installed. Install with: pip install google-generativeai")
+        self._genai = genai
+        
         genai.configure(api_key=api_key)
         self.client = genai.GenerativeModel(self.model)
     
@@ -77,12 +79,11 @@ class LLMPortfolioAnalyzer:
         """Setup Ollama for local models"""
         self.ollama_host = self.config.host
         
-        # Test Ollama connection
-        try:
-            response = requests.get(f"{self.ollama_host}/api/tags", timeout=5)
-            if response.status_code != 200:
-                raise ConnectionError("Cannot connect to Ollama")
-        except requests.exceptions.RequestException:
+        # Reuse the config manager's pooled keep-alive connections for every generate call
+        self._session = self.config_manager.http_session
+        
+        # Test Ollama connection (probed once per process by the config manager)
+        if not self.config_manager.ollama_reachable:
             raise ConnectionError(
                 "Ollama not accessible. Make sure Ollama is running on "
                 f"{self.ollama_host} and the model '{self.model}' is installed."
@@ -94,7 +95,9 @@ class LLMPortfolioAnalyzer:
         data = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
+            # Keep the model loaded between the back-to-back prompts of a run
+            "keep_alive": "10m",
             "options": {
                 "temperature": self.config.temperature,
                 "num_predict": self.config.max_tokens
@@ -102,9 +105,20 @@ class LLMPortfolioAnalyzer:
         }
         
         try:
-            response = requests.post(url, json=data, timeout=self.config.timeout)
-            response.raise_for_status()
-            return response.json()["response"]
+            with self._session.post(url, json=data, stream=True, timeout=self.config.timeout) as response:
+                response.raise_for_status()
+                chunks = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    # Ollama reports mid-stream failures as {"error": ...}
+                    if "error" in chunk:
+                        raise Exception(f"Ollama API error: {chunk['error']}")
+                    chunks.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        break
+                return "".join(chunks)
         except requests.exceptions.RequestException as e:
             raise Exception(f"Ollama API error: {e}")
     
@@ -136,19 +150,15 @@ class LLMPortfolioAnalyzer:
         current_value = latest_total['Total Equity']
         total_return = ((current_value - initial_value) / initial_value) * 100
         
-        # Get individual stock performance
-        stock_performance = []
-        for ticker in portfolio_data['Ticker'].unique():
-            if ticker != 'TOTAL':
-                stock_data = portfolio_data[portfolio_data['Ticker'] == ticker]
-                if not stock_data.empty:
-                    latest_stock = stock_data.iloc[-1]
-                    stock_performance.append({
-                        'ticker': ticker,
-                        'current_price': latest_stock.get('Current Price', 'N/A'),
-                        'pnl': latest_stock.get('PnL', 'N/A'),
-                        'action': latest_stock.get('Action', 'N/A')
-                    })
+        # Get individual stock performance (latest row per ticker, one pass)
+        latest = (
+            portfolio_data[portfolio_data['Ticker'] != 'TOTAL']
+            .groupby('Ticker', sort=False)
+            .tail(1)
+            .reindex(columns=['Ticker', 'Current Price', 'PnL', 'Action'], fill_value='N/A')
+        )
+        latest.columns = ['ticker', 'current_price', 'pnl', 'action']
+        stock_performance = latest.to_dict('records')
         
         prompt = f"""
         As a professional portfolio analyst, analyze the following micro-cap portfolio performance:
@@ -160,7 +170,7 @@ class LLMPortfolioAnalyzer:
         - Cash Balance: ${latest_total.get('Cash Balance', 0):.2f}
         
         Individual Stock Performance:
-        {json.dumps(stock_performance, indent=2)}
+        {_dumps_indented(stock_performance)}
         
         Please provide:
         1. Overall portfolio assessment
@@ -201,6 +211,53 @@ class LLMPortfolioAnalyzer:
         
         return self.generate_response(prompt)
     
+    def research_stocks(self, items: List[Tuple[str, Optional[float]]]) -> Dict[str, str]:
+        """Research several stocks with a single LLM call
+        
+        Args:
+            items: (ticker, current_price) pairs
+        
+        Returns:
+            Mapping of ticker to its section of the response; tickers the
+            model did not answer under their own header are omitted
+        """
+        sections = "\n".join(
+            f"## {ticker}" + (f" @ ${price}" if price else "") for ticker, price in items
+        )
+        
+        prompt = f"""
+        As a professional equity research analyst, provide a comprehensive analysis of each of these stocks:
+        
+        {sections}
+        
+        For each stock, analyze:
+        1. Business model and competitive position
+        2. Recent financial performance and key metrics
+        3. Upcoming catalysts and events to watch
+        4. Risk factors and potential headwinds
+        5. Valuation assessment
+        6. Investment thesis (bull/bear cases)
+        
+        Focus on micro-cap specific considerations such as:
+        - Liquidity concerns
+        - Institutional ownership
+        - Regulatory risks
+        - Growth potential vs. execution risk
+        
+        Start each stock's analysis with its header line exactly as given above (e.g. "## TICKER")
+        and do not use "##" headers anywhere else.
+        """
+        
+        response = self.generate_response(prompt)
+        parts = _SECTION_HEADER.split(response)
+        # parts = [preamble, ticker1, body1, ticker2, body2, ...]
+        wanted = {ticker for ticker, _ in items}
+        return {
+            ticker: body.strip()
+            for ticker, body in zip(parts[1::2], parts[2::2])
+            if ticker in wanted
+        }
+    
     def generate_trading_strategy(self, portfolio_data: pd.DataFrame, market_conditions: str = "") -> str:
         """Generate trading strategy recommendations"""
         
@@ -237,14 +294,29 @@ class LLMPortfolioAnalyzer:
         
         latest_data = portfolio_data.groupby('Ticker').last().reset_index()
         
+        columns = ['Ticker', 'Shares', 'Current Price', 'PnL']
+        rows = latest_data.reindex(columns=columns, fill_value='N/A').itertuples(index=False, name=None)
+        
         formatted = []
-        for _, row in latest_data.iterrows():
-            if row['Ticker'] != 'TOTAL':
-                formatted.append(f"- {row['Ticker']}: {row.get('Shares', 'N/A')} shares @ ${row.get('Current Price', 'N/A')}, P&L: ${row.get('PnL', 'N/A')}")
+        for ticker, shares, price, pnl in rows:
+            if ticker != 'TOTAL':
+                formatted.append(f"- {ticker}: {shares} shares @ ${price}, P&L: ${pnl}")
         
         return "\n".join(formatted) if formatted else "No individual stock positions"
 
 
+@functools.lru_cache(maxsize=1)
+def get_analyzer() -> LLMPortfolioAnalyzer:
+    """Get a shared analyzer, preferring local Ollama and falling back to Gemini"""
+    errors = []
+    for provider in ('ollama', 'gemini'):
+        try:
+            return LLMPortfolioAnalyzer(provider=provider)
+        except Exception as e:
+            errors.append(f"{provider}: {e}")
+    raise RuntimeError("No LLM provider available (" + "; ".join(errors) + ")")
+
+
 def main():
     """Example usage of the LLM Portfolio Analyzer"""
     
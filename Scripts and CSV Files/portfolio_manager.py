@@ -3,15 +3,123 @@ Comprehensive Portfolio Management System with AI Integration
 Centralizes all portfolio operations with built-in AI analysis
 """
 
+import functools
+import hashlib
+import importlib.metadata
+import io
+import json
+import os
+import re
+from dataclasses import dataclass, field
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from llm_integration import LLMPortfolioAnalyzer
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from compat import ORJSON_AVAILABLE, njit, orjson
 import warnings
 warnings.filterwarnings('ignore')
 
+if TYPE_CHECKING:
+    from llm_integration import LLMPortfolioAnalyzer
+
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+
+
+def _read_json(path: str):
+    """Load a JSON sidecar file, using orjson when it is installed"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def _write_json(path: str, obj):
+    """Write a JSON sidecar file, using orjson when it is installed"""
+    data = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY) if ORJSON_AVAILABLE else json.dumps(obj).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+# yfinance moved to curl_cffi in 0.2.54 and rejects requests/requests_cache sessions from then on
+YF_FIRST_SESSIONLESS_VERSION = (0, 2, 54)
+
+
+def _yf_accepts_custom_session() -> bool:
+    """Whether the installed yfinance takes a requests-style session, checked without importing it"""
+    try:
+        version = importlib.metadata.version('yfinance')
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    parts = tuple(int(p) for p in re.findall(r'\d+', version)[:3])
+    return parts < YF_FIRST_SESSIONLESS_VERSION
+
+
+@functools.lru_cache(maxsize=1)
+def _get_yf():
+    """Import yfinance on first use so commands that never fetch prices skip its import cost"""
+    import yfinance as yf
+    return yf
+
+
+@njit(cache=True)
+def _check_stop_losses_kernel(current_prices, stop_losses):
+    """Boolean mask of positions whose price is at or below the stop (NaN prices never trigger)"""
+    n = current_prices.shape[0]
+    hit = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        hit[i] = current_prices[i] <= stop_losses[i]
+    return hit
+
+
+@dataclass
+class MarketSnapshot:
+    """Latest market data as parallel arrays aligned with `tickers`"""
+    tickers: np.ndarray
+    current: np.ndarray
+    previous: np.ndarray
+    volume: np.ndarray
+    change_pct: np.ndarray
+    _index: Dict[str, int] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers.tolist())}
+    
+    def __contains__(self, ticker) -> bool:
+        return ticker in self._index
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __getitem__(self, ticker: str) -> Dict:
+        """Dict view of one ticker, matching the old dict-of-dicts layout"""
+        i = self._index[ticker]
+        return {
+            'current_price': float(self.current[i]),
+            'previous_price': float(self.previous[i]),
+            'volume': float(self.volume[i]),
+            'change_percent': float(self.change_pct[i])
+        }
+    
+    def current_prices(self, tickers: List[str]) -> np.ndarray:
+        """Current prices for `tickers`, NaN where no data was fetched"""
+        idx = np.fromiter((self._index.get(t, -1) for t in tickers), dtype=np.intp, count=len(tickers))
+        prices = np.full(len(tickers), np.nan)
+        found = idx >= 0
+        prices[found] = self.current[idx[found]]
+        return prices
+
 
 class AIPortfolioManager:
     """
@@ -19,85 +127,302 @@ class AIPortfolioManager:
     Handles all trading operations, risk management, and AI-powered insights
     """
     
+    # Benchmarks fetched alongside the holdings for the daily report
+    BENCHMARK_TICKERS = ('^RUT', 'IWO', 'XBI')
+    # Yahoo accepts roughly 20 symbols per batched download
+    DOWNLOAD_BATCH_SIZE = 20
+    # Seconds to wait on per-ticker downloads when the batched request fails
+    FETCH_TIMEOUT = 10
+    # Seconds an AI response stays valid for identical inputs
+    AI_CACHE_TTL = 6 * 60 * 60
+    # Running metrics state so each day only folds in the new equity points
+    METRICS_STATE_FILE = '.metrics_state.json'
+    # Hash and AI outputs of the last successful run, to skip identical reruns
+    LAST_RUN_FILE = '.last_run.json'
+    # Column types for the portfolio CSV, so the parser skips type inference
+    PORTFOLIO_DTYPES = {
+        'Ticker': 'string',
+        'Shares': 'float64',
+        'Cost Basis': 'float64',
+        'Current Price': 'float64',
+        'Stop Loss': 'float64',
+        'PnL': 'float64',
+        'Cash Balance': 'float64',
+        'Total Equity': 'float64',
+    }
+    
     def __init__(self, initial_cash: float = 100.0, use_ai: bool = True):
         self.initial_cash = initial_cash
         self.use_ai = use_ai
         self.today = datetime.today().strftime('%Y-%m-%d')
         
+        # (path, mtime, DataFrame) of the last portfolio CSV loaded
+        self._portfolio_cache = None
+        
+        # Cache Yahoo responses on disk so repeated runs skip the network
+        # (only on yfinance releases that still accept a custom session)
+        self.session = None
+        if REQUESTS_CACHE_AVAILABLE and _yf_accepts_custom_session():
+            self.session = requests_cache.CachedSession(
+                cache_name='.yf_cache',
+                backend='sqlite',
+                expire_after=self._yf_cache_expiry(),
+                allowable_methods=('GET', 'POST'),
+            )
+        
+        # Welford/running-max state from previous metric calculations
+        self._metrics_state = self._load_metrics_state()
+        
+        # Reuse AI responses for unchanged inputs across runs
+        self._ai_cache = diskcache.Cache('.ai_cache') if DISKCACHE_AVAILABLE else None
+        
         # Initialize AI analyzer
         if self.use_ai:
-            try:
-                self.ai_analyzer = LLMPortfolioAnalyzer(provider="ollama")
-                print("✅ AI Analyzer initialized (Ollama)")
-            except:
-                try:
-                    self.ai_analyzer = LLMPortfolioAnalyzer(provider="gemini")
-                    print("✅ AI Analyzer initialized (Gemini)")
-                except:
-                    print("⚠️  AI Analyzer unavailable - continuing without AI features")
-                    self.use_ai = False
+            self.ai_analyzer, provider = self._init_ai()
+            if self.ai_analyzer is not None:
+                print(f"✅ AI Analyzer initialized ({provider.capitalize()})")
+            else:
+                print("⚠️  AI Analyzer unavailable - continuing without AI features")
+                self.use_ai = False
+    
+    @staticmethod
+    def _probe(provider: str) -> Optional['LLMPortfolioAnalyzer']:
+        """Try to set up an analyzer for one provider, returning None if it isn't usable"""
+        try:
+            from llm_integration import LLMPortfolioAnalyzer
+            return LLMPortfolioAnalyzer(provider=provider)
+        except Exception:
+            return None
+    
+    def _init_ai(self) -> Tuple[Optional['LLMPortfolioAnalyzer'], Optional[str]]:
+        """Probe Ollama and Gemini concurrently, preferring Ollama when both are live"""
+        preference = ('ollama', 'gemini')
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=len(preference))
+        try:
+            futures = {executor.submit(self._probe, p): p for p in preference}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                # Stop as soon as the best provider still in the running is known to be live
+                for provider in preference:
+                    if provider not in results:
+                        break
+                    if results[provider] is not None:
+                        return results[provider], provider
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None, None
+    
+    @staticmethod
+    def _yf_cache_expiry() -> int:
+        """Seconds to keep cached Yahoo responses: short while the US market is open"""
+        try:
+            now = datetime.now(ZoneInfo("America/New_York"))
+        except ZoneInfoNotFoundError:
+            now = datetime.now()  # no tz database (e.g. Windows without tzdata)
+        market_open = now.weekday() < 5 and time(9, 30) <= now.time() <= time(16, 0)
+        return 60 if market_open else 900
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _is_valid_ticker(ticker: str) -> bool:
+        """Cheap format check so malformed symbols never reach Yahoo"""
+        return bool(re.fullmatch(r'\^?[A-Z0-9][A-Z0-9.\-]{0,9}', ticker))
+    
+    def _yf_download(self, tickers: str, **kwargs) -> pd.DataFrame:
+        """yf.download through the cached session, if any"""
+        if self.session is not None:
+            kwargs['session'] = self.session
+        return _get_yf().download(tickers, **kwargs)
+    
+    @staticmethod
+    def _ai_cache_key(*parts) -> str:
+        """Exact-match cache key over the (stringified) inputs of an AI call"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def _cached_ai_call(self, key: str, generate):
+        """Return the cached response for key, or call generate() and cache it"""
+        if self._ai_cache is None:
+            return generate()
+        
+        cached = self._ai_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = generate()
+        self._ai_cache.set(key, response, expire=self.AI_CACHE_TTL)
+        return response
+    
+    @staticmethod
+    def _write_if_changed(path: str, text: str):
+        """Write text to path, skipping the write when the file already holds identical content"""
+        data = text.encode('utf-8')
+        try:
+            with open(path, 'rb') as f:
+                if hashlib.md5(f.read()).digest() == hashlib.md5(data).digest():
+                    return
+        except FileNotFoundError:
+            pass
+        with open(path, 'wb', buffering=1 << 20) as f:
+            f.write(data)
     
     def load_portfolio(self, portfolio_file: str = "Scripts and CSV Files/chatgpt_portfolio_update.csv") -> pd.DataFrame:
         """Load current portfolio from CSV"""
         try:
-            return pd.read_csv(portfolio_file)
+            # Skip re-parsing when the file hasn't changed since the last load
+            mtime = os.path.getmtime(portfolio_file)
+            if self._portfolio_cache and self._portfolio_cache[:2] == (portfolio_file, mtime):
+                return self._portfolio_cache[2]
+            
+            read_kwargs = dict(dtype=self.PORTFOLIO_DTYPES, parse_dates=['Date'], na_values=[' '])
+            try:
+                portfolio_df = pd.read_csv(portfolio_file, engine='pyarrow', **read_kwargs)
+            except ImportError:
+                portfolio_df = pd.read_csv(portfolio_file, **read_kwargs)
+            
+            self._portfolio_cache = (portfolio_file, mtime, portfolio_df)
+            return portfolio_df
         except FileNotFoundError:
             print(f"Portfolio file {portfolio_file} not found. Creating new portfolio.")
             return pd.DataFrame()
     
+    @staticmethod
+    def _latest_rows(portfolio_df: pd.DataFrame) -> pd.DataFrame:
+        """Latest row for each ticker in the portfolio history"""
+        # Rows out of date order (or with missing dates) need tie-breaking by Date;
+        # undated rows sort first so they never count as the latest
+        if 'Date' in portfolio_df.columns and not portfolio_df['Date'].is_monotonic_increasing:
+            ordered = portfolio_df.sort_values('Date', kind='stable', na_position='first')
+            return ordered.groupby('Ticker', sort=False).tail(1)
+        
+        # First occurrence in the reversed column is the last one in file order
+        tickers = portfolio_df['Ticker'].to_numpy()
+        try:
+            _, first_in_reversed = np.unique(tickers[::-1], return_index=True)
+        except TypeError:
+            # Blank tickers can't be sorted alongside strings; groupby drops them
+            return portfolio_df.groupby('Ticker', sort=False).tail(1)
+        return portfolio_df.iloc[len(tickers) - 1 - first_in_reversed]
+    
     def get_current_positions(self, portfolio_df: pd.DataFrame) -> Dict:
         """Extract current positions from portfolio DataFrame"""
         if portfolio_df.empty:
             return {"positions": [], "cash": self.initial_cash, "total_equity": self.initial_cash}
         
-        # Get latest data for each ticker
-        latest_data = portfolio_df.groupby('Ticker').last().reset_index()
+        latest_data = self._latest_rows(portfolio_df)
         
         positions = []
         cash = 0
         total_equity = 0
         
-        for _, row in latest_data.iterrows():
-            if row['Ticker'] == 'TOTAL':
-                cash = row.get('Cash Balance', 0)
-                total_equity = row.get('Total Equity', 0)
+        columns = ['Ticker', 'Shares', 'Cost Basis', 'Current Price', 'Stop Loss', 'PnL', 'Cash Balance', 'Total Equity']
+        rows = latest_data.reindex(columns=columns, fill_value=0).itertuples(index=False, name=None)
+        
+        for ticker, shares, cost_basis, current_price, stop_loss, pnl, cash_balance, equity in rows:
+            if ticker == 'TOTAL':
+                cash = cash_balance
+                total_equity = equity
             else:
                 positions.append({
-                    'ticker': row['Ticker'],
-                    'shares': row.get('Shares', 0),
-                    'cost_basis': row.get('Cost Basis', 0),
-                    'current_price': row.get('Current Price', 0),
-                    'stop_loss': row.get('Stop Loss', 0),
-                    'pnl': row.get('PnL', 0)
+                    'ticker': ticker,
+                    'shares': shares,
+                    'cost_basis': cost_basis,
+                    'current_price': current_price,
+                    'stop_loss': stop_loss,
+                    'pnl': pnl
                 })
         
         return {"positions": positions, "cash": cash, "total_equity": total_equity}
     
-    def fetch_market_data(self, tickers: List[str], period: str = "2d") -> Dict:
+    @staticmethod
+    def _summarize_prices(ticker_data: pd.DataFrame) -> Optional[Tuple[float, float, float, float]]:
+        """Reduce one ticker's OHLCV frame to (current, previous, volume, change %), or None if empty"""
+        ticker_data = ticker_data.dropna(how='all')
+        if ticker_data.empty:
+            return None
+        
+        current_price = float(ticker_data['Close'].iloc[-1])
+        prev_price = float(ticker_data['Close'].iloc[-2]) if len(ticker_data) > 1 else current_price
+        volume = float(ticker_data['Volume'].iloc[-1])
+        change_pct = ((current_price - prev_price) / prev_price) * 100
+        
+        return current_price, prev_price, volume, change_pct
+    
+    def fetch_market_data(self, tickers: List[str], period: str = "2d") -> MarketSnapshot:
         """Fetch current market data for given tickers"""
-        market_data = {}
+        # One row per requested ticker; rows left NaN had no data and are dropped below
+        values = np.full((len(tickers), 4), np.nan)
         
-        for ticker in tickers:
+        # One batched request per chunk of symbols instead of one per ticker
+        for start in range(0, len(tickers), self.DOWNLOAD_BATCH_SIZE):
+            batch = tickers[start:start + self.DOWNLOAD_BATCH_SIZE]
             try:
-                data = yf.download(ticker, period=period, progress=False)
-                if not data.empty:
-                    current_price = float(data['Close'].iloc[-1])
-                    prev_price = float(data['Close'].iloc[-2]) if len(data) > 1 else current_price
-                    volume = float(data['Volume'].iloc[-1])
-                    change_pct = ((current_price - prev_price) / prev_price) * 100
-                    
-                    market_data[ticker] = {
-                        'current_price': current_price,
-                        'previous_price': prev_price,
-                        'volume': volume,
-                        'change_percent': change_pct
-                    }
-                else:
-                    print(f"⚠️  No data available for {ticker}")
+                data = self._yf_download(" ".join(batch), period=period, group_by='ticker',
+                                         threads=True, progress=False, auto_adjust=False)
             except Exception as e:
-                print(f"❌ Error fetching data for {ticker}: {e}")
-        
-        return market_data
+                print(f"⚠️  Batched download failed ({e}); fetching tickers individually")
+                for i, summary in self._fetch_market_data_parallel(batch, period).items():
+                    values[start + i] = summary
+                continue
+            
+            for i, ticker in enumerate(batch, start):
+                try:
+                    # Older yfinance returns flat columns for a single-symbol batch
+                    ticker_data = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                    summary = self._summarize_prices(ticker_data)
+                    if summary:
+                        values[i] = summary
+                    else:
+                        print(f"⚠️  No data available for {ticker}")
+                except Exception as e:
+                    print(f"❌ Error fetching data for {ticker}: {e}")
+        
+        found = ~np.isnan(values[:, 0])
+        values = values[found]
+        return MarketSnapshot(
+            tickers=np.asarray(tickers, dtype=object)[found],
+            current=values[:, 0],
+            previous=values[:, 1],
+            volume=values[:, 2],
+            change_pct=values[:, 3]
+        )
+    
+    def _fetch_market_data_parallel(self, tickers: List[str], period: str) -> Dict[int, Tuple]:
+        """Fallback for fetch_market_data: one download per ticker on a thread pool, keyed by position in `tickers`"""
+        summaries = {}
+        
+        executor = ThreadPoolExecutor(max_workers=min(8, len(tickers)))
+        # threads=False so yfinance doesn't spawn its own pool inside each worker
+        futures = {
+            executor.submit(self._yf_download, ticker, period=period, progress=False, threads=False): i
+            for i, ticker in enumerate(tickers)
+        }
+        try:
+            for future in as_completed(futures, timeout=self.FETCH_TIMEOUT):
+                ticker = tickers[futures[future]]
+                try:
+                    data = future.result()
+                    if isinstance(data.columns, pd.MultiIndex):
+                        data.columns = data.columns.get_level_values(0)
+                    summary = self._summarize_prices(data)
+                    if summary:
+                        summaries[futures[future]] = summary
+                    else:
+                        print(f"⚠️  No data available for {ticker}")
+                except Exception as e:
+                    print(f"❌ Error fetching data for {ticker}: {e}")
+        except FuturesTimeoutError:
+            # Don't let one slow ticker stall the whole report
+            pending = [tickers[i] for f, i in futures.items() if not f.done()]
+            print(f"❌ Timed out fetching data for {', '.join(pending)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return summaries
     
     def analyze_portfolio_with_ai(self, portfolio_df: pd.DataFrame) -> Optional[str]:
         """Generate AI analysis of current portfolio"""
@@ -105,13 +430,13 @@ class AIPortfolioManager:
             return None
         
         try:
-            analysis = self.ai_analyzer.analyze_portfolio_performance(portfolio_df)
+            key = self._ai_cache_key('analysis', portfolio_df.to_csv(index=False))
+            analysis = self._cached_ai_call(
+                key, lambda: self.ai_analyzer.analyze_portfolio_performance(portfolio_df))
             
             # Save analysis
-            with open(f"Scripts and CSV Files/ai_daily_analysis_{self.today}.txt", "w") as f:
-                f.write(f"AI Daily Portfolio Analysis - {self.today}\n")
-                f.write("="*50 + "\n")
-                f.write(analysis)
+            self._write_if_changed(f"Scripts and CSV Files/ai_daily_analysis_{self.today}.txt",
+                                   f"AI Daily Portfolio Analysis - {self.today}\n" + "="*50 + "\n" + analysis)
             
             return analysis
         except Exception as e:
@@ -124,13 +449,14 @@ class AIPortfolioManager:
             return None
         
         try:
-            research = self.ai_analyzer.research_stock(ticker, current_price)
+            price_key = round(current_price, 2) if current_price is not None else None
+            key = self._ai_cache_key('research', ticker, price_key, self.today)
+            research = self._cached_ai_call(
+                key, lambda: self.ai_analyzer.research_stock(ticker, current_price))
             
             # Save research
-            with open(f"Scripts and CSV Files/ai_research_{ticker}_{self.today}.txt", "w") as f:
-                f.write(f"AI Stock Research: {ticker} - {self.today}\n")
-                f.write("="*50 + "\n")
-                f.write(research)
+            self._write_if_changed(f"Scripts and CSV Files/ai_research_{ticker}_{self.today}.txt",
+                                   f"AI Stock Research: {ticker} - {self.today}\n" + "="*50 + "\n" + research)
             
             return research
         except Exception as e:
@@ -143,77 +469,122 @@ class AIPortfolioManager:
             return None
         
         try:
-            strategy = self.ai_analyzer.generate_trading_strategy(portfolio_df, market_conditions)
+            key = self._ai_cache_key('strategy', portfolio_df.to_csv(index=False), market_conditions)
+            strategy = self._cached_ai_call(
+                key, lambda: self.ai_analyzer.generate_trading_strategy(portfolio_df, market_conditions))
             
             # Save strategy
-            with open(f"Scripts and CSV Files/ai_strategy_{self.today}.txt", "w") as f:
-                f.write(f"AI Trading Strategy - {self.today}\n")
-                f.write("="*50 + "\n")
-                f.write(strategy)
+            self._write_if_changed(f"Scripts and CSV Files/ai_strategy_{self.today}.txt",
+                                   f"AI Trading Strategy - {self.today}\n" + "="*50 + "\n" + strategy)
             
             return strategy
         except Exception as e:
             print(f"AI strategy generation failed: {e}")
             return None
     
-    def check_stop_losses(self, positions: List[Dict], market_data: Dict) -> List[Dict]:
+    def check_stop_losses(self, positions: List[Dict], market_data: MarketSnapshot) -> List[Dict]:
         """Check for stop loss triggers and return sell recommendations"""
-        stop_loss_triggers = []
-        
-        for position in positions:
-            ticker = position['ticker']
-            if ticker in market_data:
-                current_price = market_data[ticker]['current_price']
-                stop_loss = position['stop_loss']
-                
-                if current_price <= stop_loss:
-                    stop_loss_triggers.append({
-                        'ticker': ticker,
-                        'current_price': current_price,
-                        'stop_loss': stop_loss,
-                        'shares': position['shares'],
-                        'reason': 'Stop Loss Triggered'
-                    })
-        
-        return stop_loss_triggers
+        if not positions:
+            return []
+        
+        # Positions without market data get a NaN price so they never trigger
+        current_prices = market_data.current_prices([pos['ticker'] for pos in positions])
+        stop_losses = np.fromiter((pos['stop_loss'] for pos in positions),
+                                  dtype=np.float64, count=len(positions))
+        hit = _check_stop_losses_kernel(current_prices, stop_losses)
+        
+        return [
+            {
+                'ticker': positions[i]['ticker'],
+                'current_price': float(current_prices[i]),
+                'stop_loss': positions[i]['stop_loss'],
+                'shares': positions[i]['shares'],
+                'reason': 'Stop Loss Triggered'
+            }
+            for i in np.flatnonzero(hit)
+        ]
+    
+    def _load_metrics_state(self) -> Optional[Dict]:
+        """Load the persisted metrics state, if any"""
+        try:
+            state = _read_json(self.METRICS_STATE_FILE)
+        except (OSError, ValueError):
+            return None
+        # orjson writes NaN as null; such a state can't be resumed
+        if any(state.get(key) is None for key in ('returns_mean', 'returns_m2', 'max_drawdown')):
+            return None
+        return state
+    
+    def _save_metrics_state(self):
+        """Persist the metrics state for the next run"""
+        try:
+            _write_json(self.METRICS_STATE_FILE, self._metrics_state)
+        except OSError as e:
+            print(f"⚠️  Could not save metrics state: {e}")
     
     def calculate_portfolio_metrics(self, portfolio_df: pd.DataFrame) -> Dict:
         """Calculate comprehensive portfolio performance metrics"""
         if portfolio_df.empty:
             return {}
         
-        # Get total equity over time
-        totals = portfolio_df[portfolio_df['Ticker'] == 'TOTAL'].copy()
-        if totals.empty:
+        # Get total equity over time, ordered by date
+        mask = portfolio_df['Ticker'].to_numpy() == 'TOTAL'
+        if not mask.any():
             return {}
         
-        totals['Date'] = pd.to_datetime(totals['Date'])
-        totals = totals.sort_values('Date')
-        
-        equity_series = totals['Total Equity'].astype(float)
+        dates = portfolio_df['Date'].to_numpy()[mask].astype('datetime64[ns]')
+        order = np.argsort(dates, kind='stable')
+        dates = dates[order]
+        equity = portfolio_df['Total Equity'].to_numpy()[mask].astype(np.float64)[order]
+        
+        # Resume from the saved state only if it still describes a prefix of this series
+        state = self._metrics_state
+        if (not state or not 0 < state['n'] <= equity.size
+                or float(equity[state['n'] - 1]) != state['last_equity']
+                or str(dates[state['n'] - 1]) != state['last_date']):
+            state = {'n': 0, 'last_equity': None, 'last_date': None,
+                     'returns_n': 0, 'returns_mean': 0.0, 'returns_m2': 0.0,
+                     'running_max': None, 'max_drawdown': 0.0}
+        
+        if state['n'] < equity.size:
+            # Welford update of the daily-return moments plus running max/drawdown
+            prev = state['last_equity']
+            k, mean, m2 = state['returns_n'], state['returns_mean'], state['returns_m2']
+            running_max, max_drawdown = state['running_max'], state['max_drawdown']
+            for x in equity[state['n']:].tolist():
+                if prev is not None:
+                    r = (x - prev) / prev
+                    k += 1
+                    delta = r - mean
+                    mean += delta / k
+                    m2 += delta * (r - mean)
+                running_max = x if running_max is None else max(running_max, x)
+                max_drawdown = min(max_drawdown, (x - running_max) / running_max)
+                prev = x
+            
+            state = {'n': int(equity.size), 'last_equity': prev, 'last_date': str(dates[-1]),
+                     'returns_n': k, 'returns_mean': mean, 'returns_m2': m2,
+                     'running_max': running_max, 'max_drawdown': max_drawdown}
+            self._metrics_state = state
+            self._save_metrics_state()
         
-        # Calculate returns
-        daily_returns = equity_series.pct_change().dropna()
-        total_return = (equity_series.iloc[-1] - self.initial_cash) / self.initial_cash
+        total_return = (state['last_equity'] - self.initial_cash) / self.initial_cash
         
         # Risk metrics
-        volatility = daily_returns.std() * np.sqrt(252)  # Annualized
+        k = state['returns_n']
+        volatility = np.sqrt(state['returns_m2'] / (k - 1)) * np.sqrt(252) if k > 1 else np.nan  # Annualized
         sharpe_ratio = (total_return * 252 - 0.045) / (volatility) if volatility > 0 else 0
-        
-        # Drawdown
-        running_max = equity_series.expanding().max()
-        drawdown = (equity_series - running_max) / running_max
-        max_drawdown = drawdown.min()
+        max_drawdown = state['max_drawdown']
         
         return {
-            'total_return': total_return,
-            'total_return_pct': total_return * 100,
-            'volatility': volatility,
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'max_drawdown_pct': max_drawdown * 100,
-            'current_equity': float(equity_series.iloc[-1]),
-            'trading_days': len(equity_series)
+            'total_return': float(total_return),
+            'total_return_pct': float(total_return * 100),
+            'volatility': float(volatility),
+            'sharpe_ratio': float(sharpe_ratio),
+            'max_drawdown': float(max_drawdown),
+            'max_drawdown_pct': float(max_drawdown * 100),
+            'current_equity': float(state['last_equity']),
+            'trading_days': state['n']
         }
     
     def generate_daily_report(self, portfolio_df: pd.DataFrame) -> str:
@@ -221,8 +592,8 @@ class AIPortfolioManager:
         current_positions = self.get_current_positions(portfolio_df)
         
         # Get market data for all positions
-        tickers = [pos['ticker'] for pos in current_positions['positions']]
-        tickers.extend(['^RUT', 'IWO', 'XBI'])  # Add benchmark tickers
+        tickers = [pos['ticker'] for pos in current_positions['positions']] + list(self.BENCHMARK_TICKERS)
+        tickers = [t for t in dict.fromkeys(tickers) if self._is_valid_ticker(t)]
         market_data = self.fetch_market_data(tickers)
         
         # Check stop losses
@@ -232,7 +603,8 @@ class AIPortfolioManager:
         metrics = self.calculate_portfolio_metrics(portfolio_df)
         
         # Build report
-        report = f"""
+        report = io.StringIO()
+        report.write(f"""
 🚀 DAILY PORTFOLIO REPORT - {self.today}
 {'='*60}
 
@@ -243,28 +615,49 @@ class AIPortfolioManager:
    Sharpe Ratio: {metrics.get('sharpe_ratio', 0):.3f}
 
 📊 CURRENT POSITIONS:
-"""
+""")
         
         for position in current_positions['positions']:
             ticker = position['ticker']
             if ticker in market_data:
                 data = market_data[ticker]
-                report += f"""   {ticker}: {position['shares']} shares @ ${data['current_price']:.2f} 
+                report.write(f"""   {ticker}: {position['shares']} shares @ ${data['current_price']:.2f} 
       Change: {data['change_percent']:+.2f}% | P&L: ${position['pnl']:.2f}
-"""
+""")
         
         if stop_losses:
-            report += f"\n🚨 STOP LOSS ALERTS:\n"
+            report.write(f"\n🚨 STOP LOSS ALERTS:\n")
             for sl in stop_losses:
-                report += f"   {sl['ticker']}: ${sl['current_price']:.2f} ≤ ${sl['stop_loss']:.2f}\n"
+                report.write(f"   {sl['ticker']}: ${sl['current_price']:.2f} ≤ ${sl['stop_loss']:.2f}\n")
         
-        report += f"\n📈 BENCHMARK COMPARISON:\n"
-        for ticker in ['^RUT', 'IWO', 'XBI']:
+        report.write(f"\n📈 BENCHMARK COMPARISON:\n")
+        for ticker in self.BENCHMARK_TICKERS:
             if ticker in market_data:
                 data = market_data[ticker]
-                report += f"   {ticker}: ${data['current_price']:.2f} ({data['change_percent']:+.2f}%)\n"
+                report.write(f"   {ticker}: ${data['current_price']:.2f} ({data['change_percent']:+.2f}%)\n")
         
-        return report
+        return report.getvalue()
+    
+    def _portfolio_hash(self, portfolio_df: pd.DataFrame) -> str:
+        """Content hash of the portfolio rows plus today's date"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.today.encode())
+        digest.update(pd.util.hash_pandas_object(portfolio_df, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+    
+    def _load_last_run(self) -> Optional[Dict]:
+        """Load the sentinel written by the last successful AI run, if any"""
+        try:
+            return _read_json(self.LAST_RUN_FILE)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_last_run(self, last_run: Dict):
+        """Persist the sentinel for the next run"""
+        try:
+            _write_json(self.LAST_RUN_FILE, last_run)
+        except OSError as e:
+            print(f"⚠️  Could not save last-run state: {e}")
     
     def run_daily_analysis(self, portfolio_file: str = "Scripts and CSV Files/chatgpt_portfolio_update.csv"):
         """Run complete daily portfolio analysis with AI integration"""
@@ -274,28 +667,54 @@ class AIPortfolioManager:
         # Load portfolio
         portfolio_df = self.load_portfolio(portfolio_file)
         
-        # Generate daily report
-        daily_report = self.generate_daily_report(portfolio_df)
-        print(daily_report)
+        ai_analysis = None
+        strategy = None
+        
+        # Same portfolio on the same day: reuse the last run's AI output
+        reuse_ai = False
+        if self.use_ai:
+            run_hash = self._portfolio_hash(portfolio_df)
+            last_run = self._load_last_run()
+            if last_run and last_run.get('hash') == run_hash:
+                print("♻️  Portfolio unchanged since last run - reusing AI analysis")
+                ai_analysis = last_run.get('ai_analysis')
+                strategy = last_run.get('strategy')
+                reuse_ai = True
+        
+        if self.use_ai and not reuse_ai:
+            # The two LLM calls are independent of each other and of the market
+            # data fetch, so run them while the daily report is being built
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                analysis_future = executor.submit(self.analyze_portfolio_with_ai, portfolio_df)
+                strategy_future = executor.submit(
+                    self.generate_trading_strategy, portfolio_df, "Current micro-cap market conditions")
+                
+                daily_report = self.generate_daily_report(portfolio_df)
+                print(daily_report)
+                
+                ai_analysis = analysis_future.result()
+                strategy = strategy_future.result()
+            
+            if ai_analysis and strategy:
+                self._save_last_run({'hash': run_hash, 'ai_analysis': ai_analysis, 'strategy': strategy})
+        else:
+            daily_report = self.generate_daily_report(portfolio_df)
+            print(daily_report)
         
-        # AI Analysis
         if self.use_ai:
             print("\n🤖 AI PORTFOLIO ANALYSIS:")
             print("-" * 40)
-            ai_analysis = self.analyze_portfolio_with_ai(portfolio_df)
             if ai_analysis:
                 print(ai_analysis)
             
             print("\n📈 AI TRADING STRATEGY:")
             print("-" * 40)
-            strategy = self.generate_trading_strategy(portfolio_df, "Current micro-cap market conditions")
             if strategy:
                 print(strategy)
         
         # Save complete report
-        complete_report = daily_report + "\n\n" + (ai_analysis or "") + "\n\n" + (strategy or "")
-        with open(f"Scripts and CSV Files/daily_report_{self.today}.txt", "w") as f:
-            f.write(complete_report)
+        complete_report = "\n\n".join([daily_report, ai_analysis or "", strategy or ""])
+        self._write_if_changed(f"Scripts and CSV Files/daily_report_{self.today}.txt", complete_report)
         
         print(f"\n✅ Complete analysis saved to daily_report_{self.today}.txt")
 
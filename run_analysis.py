@@ -11,14 +11,14 @@ from pathlib import Path
 # Add Scripts directory to path
 sys.path.append(str(Path("Scripts and CSV Files")))
 
-from portfolio_manager import AIPortfolioManager
-from llm_integration import LLMPortfolioAnalyzer
-from ai_config import get_ai_config
-import pandas as pd
+# Heavy modules (pandas, yfinance, LLM clients) are imported inside each command
+# so that e.g. `status` doesn't pay for what it never uses
 
 
 def run_daily_analysis():
     """Run daily portfolio analysis"""
+    from portfolio_manager import AIPortfolioManager
+    
     print("🚀 Running Daily Portfolio Analysis...")
     manager = AIPortfolioManager(use_ai=True)
     manager.run_daily_analysis()
@@ -26,6 +26,9 @@ def run_daily_analysis():
 
 def run_performance_analysis():
     """Run comprehensive performance analysis"""
+    import pandas as pd
+    from llm_integration import LLMPortfolioAnalyzer
+    
     print("📊 Running Performance Analysis...")
     
     try:
@@ -56,6 +59,8 @@ def run_performance_analysis():
 
 def run_stock_research(ticker: str):
     """Run AI research on a specific stock"""
+    from llm_integration import LLMPortfolioAnalyzer
+    
     print(f"🔍 Running Stock Research for {ticker}...")
     
     try:
@@ -80,12 +85,14 @@ def run_stock_research(ticker: str):
 
 def check_ai_status():
     """Check AI configuration and availability"""
+    from ai_config import get_ai_config
+    
     print("🔍 Checking AI Configuration...")
     
     config_manager = get_ai_config()
-    status = config_manager.validate_setup()
-    available = config_manager.get_available_providers()
-    preferred = config_manager.get_preferred_provider()
+    status = config_manager.setup_status
+    available = config_manager.available_providers
+    preferred = config_manager.preferred_provider
     
     print("\n📋 AI PROVIDER STATUS:")
     print("-" * 30)
@@ -8,8 +8,14 @@ import os
 import sys
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 
+# One pooled session for every Ollama HTTP check in this script
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_session.headers['Connection'] = 'keep-alive'
+
 def check_python_packages():
     """Check if required Python packages are installed"""
     required_packages = [
@@ -68,7 +74,7 @@ def check_ollama_installation():
     
     # Check if Ollama is running
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = _session.get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
             print("✅ Ollama service is running")
             